@@ -1,6 +1,8 @@
-import csv
-import datetime as dt
 from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
 from graph_algorithms import Graph
 
 @dataclass
@@ -10,36 +12,50 @@ class City:
     state: str
     sea_level_ft: float  # elevation
 
+class CityMap(dict):
+    """dict of city_id -> City carrying a prebuilt lowercase name index."""
+    def __init__(self, cities):
+        super().__init__(cities)
+        self.name_index = {c.name.lower(): cid for cid, c in cities.items()}
+
 BASE_MPG = 45.0  # same sea level
 MAX_SPEED = 75.0  # mph
 MAX_HOURS_PER_DAY = 8.0
 
 def load_cities(path="data/cities.csv"):
+    # pandas C parser instead of one dict per row from csv.DictReader
+    df = pd.read_csv(
+        path, dtype={"city_id": np.int32, "sea_level_ft": np.float64}
+    )
     cities = {}
-    with open(path, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            cid = int(row["city_id"])
-            cities[cid] = City(
-                cid,
-                row["city_name"],
-                row["state"],
-                float(row["sea_level_ft"]),
-            )
-    return cities
+    for cid, name, state, sea in zip(
+        df["city_id"].tolist(),
+        df["city_name"].tolist(),
+        df["state"].tolist(),
+        df["sea_level_ft"].tolist(),
+    ):
+        cities[cid] = City(cid, name, state, sea)
+    return CityMap(cities)
 
 def load_graph(cities, path="data/edges.csv"):
+    df = pd.read_csv(
+        path,
+        dtype={
+            "from_id": np.int32,
+            "to_id": np.int32,
+            "map_distance_miles": np.float64,
+        },
+    )
     g = Graph(len(cities))
-    with open(path, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            u = int(row["from_id"])
-            v = int(row["to_id"])
-            d = float(row["map_distance_miles"])
-            g.add_edge(u, v, d, undirected=True)
+    for u, v, d in zip(
+        df["from_id"].tolist(),
+        df["to_id"].tolist(),
+        df["map_distance_miles"].tolist(),
+    ):
+        g.add_edge(u, v, d, undirected=True)
     return g
 
-def load_weather_risk(path="data/weather_nov2025.csv"):
+def load_weather_risk(path="data/weather_nov2025.csv", chunksize=100_000):
     """
     You create this CSV with either:
     - raw conditions + convert to risk, or
@@ -47,20 +63,60 @@ def load_weather_risk(path="data/weather_nov2025.csv"):
     Example header:
     city_id,date,condition,risk
     0,2025-11-01,Sunny,1
+
+    Returns (risk_arr, start_date): a dense [n_cities, n_days] array indexed
+    by risk_arr[city_id, (date - start_date).days], with 1.0 (the old dict
+    default) for any missing cell. The CSV is streamed in chunks, so memory
+    stays bounded by the dense array rather than the file size.
     """
-    risk = {}
-    with open(path, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            cid = int(row["city_id"])
-            date = dt.date.fromisoformat(row["date"])
-            r = float(row["risk"])
-            risk[(cid, date)] = r
-    return risk
+    risk_arr = None
+    start_date = None
+
+    reader = pd.read_csv(
+        path,
+        parse_dates=["date"],
+        dtype={"city_id": np.int32, "risk": np.float64},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        if chunk.empty:
+            continue
+        chunk_start = chunk["date"].min()
+        if start_date is None:
+            start_date = chunk_start
+        elif chunk_start < start_date:
+            # a later chunk introduced earlier dates: prepend default columns
+            extra = (start_date - chunk_start).days
+            risk_arr = np.concatenate(
+                [np.full((risk_arr.shape[0], extra), 1.0), risk_arr], axis=1
+            )
+            start_date = chunk_start
+
+        day_idx = (chunk["date"] - start_date).dt.days.to_numpy()
+        n_cities = int(chunk["city_id"].max()) + 1
+        n_days = int(day_idx.max()) + 1
+
+        if risk_arr is None:
+            risk_arr = np.full((n_cities, n_days), 1.0)
+        elif n_cities > risk_arr.shape[0] or n_days > risk_arr.shape[1]:
+            grown = np.full(
+                (max(n_cities, risk_arr.shape[0]), max(n_days, risk_arr.shape[1])),
+                1.0,
+            )
+            grown[:risk_arr.shape[0], :risk_arr.shape[1]] = risk_arr
+            risk_arr = grown
+
+        risk_arr[chunk["city_id"].to_numpy(), day_idx] = chunk["risk"].to_numpy()
+
+    if risk_arr is None:
+        raise ValueError(f"No weather rows found in {path}")
+    return risk_arr, start_date.date()
 
 def name_to_id(cities, city_name):
-    city_name = city_name.lower()
-    for cid, c in cities.items():
-        if c.name.lower() == city_name:
-            return cid
-    raise ValueError(f"City {city_name} not found")
\ No newline at end of file
+    index = getattr(cities, "name_index", None)
+    if index is None:  # plain dicts still work, just without the O(1) index
+        index = {c.name.lower(): cid for cid, c in cities.items()}
+    try:
+        return index[city_name.lower()]
+    except KeyError:
+        raise ValueError(f"City {city_name} not found") from None
\ No newline at end of file
@@ -1,5 +1,39 @@
-from collections import deque
-import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graph_kernels import bfs_csr
+
+# worker-side views of the shared CSR/visited buffers, set by _bfs_worker_init
+_bfs_shared = {}
+
+def _bfs_worker_init(shm_names, n, m):
+    blocks = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    _bfs_shared["blocks"] = blocks  # keep alive for the worker's lifetime
+    _bfs_shared["indptr"] = np.ndarray(n + 1, dtype=np.int32, buffer=blocks[0].buf)
+    _bfs_shared["indices"] = np.ndarray(m, dtype=np.int32, buffer=blocks[1].buf)
+    _bfs_shared["visited"] = np.ndarray(n, dtype=np.bool_, buffer=blocks[2].buf)
+
+def _bfs_expand_chunk(chunk):
+    """Expand one slice of the frontier: unvisited neighbours + their parents."""
+    return _expand_frontier(
+        _bfs_shared["indptr"], _bfs_shared["indices"], _bfs_shared["visited"], chunk
+    )
+
+def _expand_frontier(indptr, indices, visited, frontier):
+    nbrs = []
+    pars = []
+    for u in frontier.tolist():
+        vs = indices[indptr[u]:indptr[u + 1]]
+        keep = vs[~visited[vs]]
+        if keep.size:
+            nbrs.append(keep)
+            pars.append(np.full(keep.size, u, dtype=np.int32))
+    if nbrs:
+        return np.concatenate(nbrs), np.concatenate(pars)
+    return np.empty(0, np.int32), np.empty(0, np.int32)
 
 class Graph:
     """
@@ -8,89 +42,289 @@ class Graph:
     """
     def __init__(self, n_vertices: int):
         self.n = n_vertices
-        self.adj = [[] for _ in range(n_vertices)]  # adj[u] = [(v, weight), ...]
+        self.adj = [[] for _ in range(n_vertices)]  # staging: adj[u] = [(v, weight), ...]
         self.edges = []  # (u, v, weight)
+        self.edge_w = {}  # (u, v) -> weight, O(1) lookup
+        self._uedges = {}  # (min(u,v), max(u,v)) -> lightest weight, for Kruskal
+        self._has_directed = False  # any undirected=False edge disables BFS pull
+        self._dist_matrix = None  # all-pairs shortest paths, built on demand
+        self._eu = None  # edge arrays (SoA), built lazily
+        self._ev = None
+        self._ew = None
+        self.indptr = None  # CSR adjacency, built by finalize()
+        self.indices = None
+        self.weights = None
 
     def add_edge(self, u: int, v: int, w: float = 1.0, undirected: bool = True):
+        if self.adj is None:
+            raise ValueError("Graph is finalized; add all edges before traversing")
         self.adj[u].append((v, w))
         self.edges.append((u, v, w))
+        self.edge_w[(u, v)] = w
         if undirected:
             self.adj[v].append((u, w))
             self.edges.append((v, u, w))
+            self.edge_w[(v, u)] = w
+        else:
+            self._has_directed = True
+
+        # deduplicate undirected edges as they arrive (lightest wins)
+        key = (min(u, v), max(u, v))
+        if key not in self._uedges or w < self._uedges[key]:
+            self._uedges[key] = w
+
+        self._eu = None  # edge arrays are stale now
+        self._dist_matrix = None
+
+    def finalize(self):
+        """Convert the staging adjacency lists into CSR arrays (idempotent).
+
+        Neighbours of u live in indices[indptr[u]:indptr[u+1]] with their
+        weights at the same positions in self.weights - contiguous and
+        cache-friendly instead of one Python tuple per edge.
+        """
+        if self.indptr is not None:
+            return
+        self.indptr = np.zeros(self.n + 1, dtype=np.int32)
+        self.indptr[1:] = np.cumsum([len(nbrs) for nbrs in self.adj])
+        m2 = int(self.indptr[-1])
+        self.indices = np.fromiter(
+            (v for nbrs in self.adj for v, _ in nbrs), dtype=np.int32, count=m2
+        )
+        self.weights = np.fromiter(
+            (w for nbrs in self.adj for _, w in nbrs), dtype=np.float64, count=m2
+        )
+        self.adj = None  # drop the staging structure
+
+        # freeze Kruskal's scan order: SoA of the deduplicated undirected
+        # edges, argsorted once at C level instead of sorted(key=lambda)
+        # on every kruskal_mst call (stable sort keeps insertion order on ties)
+        mu = len(self._uedges)
+        self._ku = np.fromiter((k[0] for k in self._uedges), dtype=np.int32, count=mu)
+        self._kv = np.fromiter((k[1] for k in self._uedges), dtype=np.int32, count=mu)
+        self._kw = np.fromiter(self._uedges.values(), dtype=np.float64, count=mu)
+        self._korder = np.argsort(self._kw, kind="stable")
+
+    def distance_matrix(self):
+        """
+        All-pairs shortest-path matrix, computed once by scipy's C-level
+        Dijkstra straight from the CSR arrays. Built lazily: callers only ask
+        for it when per-pair queries start repeating (e.g. routes with many
+        missing edges), where one precompute beats a Dijkstra per lookup.
+        """
+        if self._dist_matrix is None:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import dijkstra
+
+            self.finalize()
+            adj = csr_matrix(
+                (self.weights, self.indices, self.indptr), shape=(self.n, self.n)
+            )
+            # the CSR arrays already hold both arcs of undirected edges
+            self._dist_matrix = dijkstra(adj, directed=True)
+        return self._dist_matrix
+
+    def neighbors(self, u: int):
+        """Iterate (v, weight) pairs of u from the CSR arrays."""
+        self.finalize()
+        s, e = self.indptr[u], self.indptr[u + 1]
+        return zip(self.indices[s:e].tolist(), self.weights[s:e].tolist())
+
+    def _materialize_edge_arrays(self):
+        """Build parallel u/v/w arrays from self.edges (lazily, on first use)."""
+        m = len(self.edges)
+        self._eu = np.fromiter((e[0] for e in self.edges), dtype=np.int32, count=m)
+        self._ev = np.fromiter((e[1] for e in self.edges), dtype=np.int32, count=m)
+        self._ew = np.fromiter((e[2] for e in self.edges), dtype=np.float64, count=m)
 
     # 1) BFS
     def bfs(self, start: int):
+        self.finalize()
+        # pull steps scan out-edges, which only works on symmetric adjacency
+        dist_arr, parent_arr = bfs_csr(
+            self.indptr, self.indices, self.n, start, not self._has_directed
+        )
+
+        # keep the Python API: lists, inf for unreachable vertices
         INF = float("inf")
-        dist = [INF] * self.n
-        parent = [-1] * self.n
-        visited = [False] * self.n
+        dist = [d if d >= 0 else INF for d in dist_arr.tolist()]
+        return dist, parent_arr.tolist()
 
-        q = deque([start])
-        visited[start] = True
-        dist[start] = 0
+    def bfs_parallel(self, start: int, n_workers: int = None, min_frontier: int = 4096):
+        """
+        Level-synchronous BFS that fans wide frontiers out across worker
+        processes over shared-memory CSR arrays. Same (dist, parent) contract
+        as bfs(); parents may differ on ties since chunk order decides them.
+        Only worth it for large graphs - small ones go straight to bfs().
+        """
+        self.finalize()
+        n = self.n
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        if n_workers <= 1 or n < min_frontier:
+            return self.bfs(start)
 
-        while q:
-            u = q.popleft()
-            for v, _ in self.adj[u]:
-                if not visited[v]:
-                    visited[v] = True
-                    dist[v] = dist[u] + 1  # in number of edges (unweighted)
-                    parent[v] = u
-                    q.append(v)
+        m = int(self.indices.shape[0])
+        shm_blocks = []
+        try:
+            # share the CSR arrays + visited bitmap; workers attach by name
+            for arr_src, size in (
+                (self.indptr, self.indptr.nbytes),
+                (self.indices, max(1, self.indices.nbytes)),
+                (np.zeros(n, dtype=np.bool_), n),
+            ):
+                blk = shared_memory.SharedMemory(create=True, size=size)
+                np.ndarray(arr_src.shape, dtype=arr_src.dtype, buffer=blk.buf)[:] = arr_src
+                shm_blocks.append(blk)
 
-        return dist, parent
+            visited = np.ndarray(n, dtype=np.bool_, buffer=shm_blocks[2].buf)
 
-    # 2) DFS
-    def dfs_recursive(self, start: int):
-        visited = [False] * self.n
-        order = []
+            dist = np.full(n, -1, dtype=np.int64)
+            parent = np.full(n, -1, dtype=np.int64)
+            dist[start] = 0
+            visited[start] = True
 
-        def _dfs(u: int):
-            visited[u] = True
-            order.append(u)
-            for v, _ in self.adj[u]:
-                if not visited[v]:
-                    _dfs(v)
+            frontier = np.array([start], dtype=np.int32)
+            level = 0
 
-        _dfs(start)
-        return order
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_bfs_worker_init,
+                initargs=([blk.name for blk in shm_blocks], n, m),
+            ) as pool:
+                while frontier.size:
+                    if frontier.size < min_frontier:
+                        # narrow frontier: not worth the fan-out overhead
+                        nbrs, pars = _expand_frontier(
+                            self.indptr, self.indices, visited, frontier
+                        )
+                    else:
+                        chunks = np.array_split(frontier, n_workers)
+                        parts = list(
+                            pool.map(_bfs_expand_chunk, [c for c in chunks if c.size])
+                        )
+                        nbrs = np.concatenate([p[0] for p in parts])
+                        pars = np.concatenate([p[1] for p in parts])
+
+                    # the master resolves races: dedupe and claim visited here
+                    fresh = ~visited[nbrs]
+                    nbrs = nbrs[fresh]
+                    pars = pars[fresh]
+                    uniq, first = np.unique(nbrs, return_index=True)
+                    visited[uniq] = True
+                    dist[uniq] = level + 1
+                    parent[uniq] = pars[first]
+                    frontier = uniq.astype(np.int32)
+                    level += 1
+        finally:
+            for blk in shm_blocks:
+                blk.close()
+                blk.unlink()
+
+        INF = float("inf")
+        return [d if d >= 0 else INF for d in dist.tolist()], parent.tolist()
+
+    # 2) DFS
+    def dfs_recursive(self, start: int):
+        # kept for callers; same pre-order as the old recursion, but without
+        # the per-vertex Python frame or the recursion-depth limit
+        return self.dfs_iterative(start)
 
     def dfs_iterative(self, start: int):
-        visited = [False] * self.n
+        self.finalize()
+        indptr, indices = self.indptr, self.indices
+
+        # one contiguous byte per vertex instead of a list of bool objects
+        visited = bytearray(self.n)
         order = []
         stack = [start]
+        stack_append = stack.append
+        stack_pop = stack.pop
 
         while stack:
-            u = stack.pop()
+            u = stack_pop()
             if not visited[u]:
-                visited[u] = True
+                visited[u] = 1
                 order.append(u)
-                for v, _ in reversed(self.adj[u]):
+                # reversed push keeps the recursive visit order
+                for v in reversed(indices[indptr[u]:indptr[u + 1]].tolist()):
                     if not visited[v]:
-                        stack.append(v)
+                        stack_append(v)
         return order
 
     # 3) Prim's MST
     def prim_mst(self, start: int = 0):
-        visited = [False] * self.n
+        self.finalize()
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+
+        # indexed min-heap keyed by key[v]: each vertex appears at most once
+        # and decrease-key replaces the old duplicate-entry-and-skip scheme,
+        # so the heap is O(V) instead of O(E)
+        INF = float("inf")
+        key = [INF] * self.n  # lightest edge into the growing tree
+        parent = [-1] * self.n
+        in_mst = bytearray(self.n)
+
+        heap = [start]
+        pos = [-1] * self.n
+        pos[start] = 0
+        key[start] = 0.0
+
+        def _swap(i, j):
+            heap[i], heap[j] = heap[j], heap[i]
+            pos[heap[i]] = i
+            pos[heap[j]] = j
+
+        def _sift_up(i):
+            while i > 0:
+                p = (i - 1) >> 1
+                if key[heap[p]] <= key[heap[i]]:
+                    break
+                _swap(i, p)
+                i = p
+
+        def _sift_down(i):
+            size = len(heap)
+            while True:
+                left = 2 * i + 1
+                right = left + 1
+                smallest = i
+                if left < size and key[heap[left]] < key[heap[smallest]]:
+                    smallest = left
+                if right < size and key[heap[right]] < key[heap[smallest]]:
+                    smallest = right
+                if smallest == i:
+                    break
+                _swap(i, smallest)
+                i = smallest
+
         mst_edges = []
         total_weight = 0.0
 
-        heap = [(0.0, -1, start)]  # (weight, from, to)
-
         while heap:
-            w, u, v = heapq.heappop(heap)
-            if visited[v]:
-                continue
-            visited[v] = True
+            # extract-min
+            v = heap[0]
+            last = heap.pop()
+            if heap:
+                heap[0] = last
+                pos[last] = 0
+                _sift_down(0)
+            pos[v] = -1
+            in_mst[v] = 1
 
-            if u != -1:
-                mst_edges.append((u, v, w))
-                total_weight += w
+            if parent[v] != -1:
+                mst_edges.append((parent[v], v, key[v]))
+                total_weight += key[v]
 
-            for nxt, wt in self.adj[v]:
-                if not visited[nxt]:
-                    heapq.heappush(heap, (wt, v, nxt))
+            s, e = indptr[v], indptr[v + 1]
+            for nxt, wt in zip(indices[s:e].tolist(), weights[s:e].tolist()):
+                if not in_mst[nxt] and wt < key[nxt]:
+                    key[nxt] = wt
+                    parent[nxt] = v
+                    if pos[nxt] == -1:
+                        heap.append(nxt)
+                        pos[nxt] = len(heap) - 1
+                    _sift_up(pos[nxt])  # decrease-key
 
         if len(mst_edges) != self.n - 1:
             print("Warning: graph may not be fully connected.")
@@ -98,44 +332,41 @@ class Graph:
 
     # 4) Kruskal's MST
     def kruskal_mst(self):
+        self.finalize()
+
         parent = list(range(self.n))
-        rank = [0] * self.n
+        size = [1] * self.n
 
         def find(x):
-            if parent[x] != x:
-                parent[x] = find(parent[x])
-            return parent[x]
+            # two-pass iterative: locate the root, then flatten the chain
+            root = x
+            while parent[root] != root:
+                root = parent[root]
+            while parent[x] != root:
+                parent[x], x = root, parent[x]
+            return root
 
         def union(a, b):
             ra, rb = find(a), find(b)
             if ra == rb:
                 return False
-            if rank[ra] < rank[rb]:
-                parent[ra] = rb
-            elif rank[ra] > rank[rb]:
-                parent[rb] = ra
-            else:
-                parent[rb] = ra
-                rank[ra] += 1
+            # union by size: smaller tree under the larger
+            if size[ra] < size[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            size[ra] += size[rb]
             return True
 
-        # deduplicate undirected edges
-        unique_edges = {}
-        for u, v, w in self.edges:
-            a, b = min(u, v), max(u, v)
-            key = (a, b)
-            if key not in unique_edges or w < unique_edges[key]:
-                unique_edges[key] = w
-
-        sorted_edges = sorted(
-            [(u, v, w) for (u, v), w in unique_edges.items()],
-            key=lambda x: x[2]
-        )
+        # walk the order frozen at finalize time - no per-call sort
+        ku = self._ku.tolist()
+        kv = self._kv.tolist()
+        kw = self._kw.tolist()
 
         mst_edges = []
         total_weight = 0.0
 
-        for u, v, w in sorted_edges:
+        for idx in self._korder.tolist():
+            u, v, w = ku[idx], kv[idx], kw[idx]
             if union(u, v):
                 mst_edges.append((u, v, w))
                 total_weight += w
@@ -144,28 +375,30 @@ class Graph:
 
     # 5) Bellman-Ford
     def bellman_ford(self, source: int):
-        INF = float("inf")
-        dist = [INF] * self.n
-        parent = [-1] * self.n
+        if self._eu is None:
+            self._materialize_edge_arrays()
+        eu, ev, ew = self._eu, self._ev, self._ew
+
+        dist = np.full(self.n, np.inf)
+        parent = np.full(self.n, -1, dtype=np.int64)
         dist[source] = 0.0
 
-        # relax edges |V| - 1 times
+        # relax all edges at once, |V| - 1 times
         for _ in range(self.n - 1):
-            updated = False
-            for u, v, w in self.edges:
-                if dist[u] != INF and dist[u] + w < dist[v]:
-                    dist[v] = dist[u] + w
-                    parent[v] = u
-                    updated = True
-            if not updated:
+            cand = dist[eu] + ew
+            mask = cand < dist[ev]
+            if not mask.any():
                 break
+            np.minimum.at(dist, ev[mask], cand[mask])
+            # an edge is the new parent where its candidate matched the minimum
+            winners = mask & (cand <= dist[ev])
+            parent[ev[winners]] = eu[winners]
 
-        # check negative cycles
-        for u, v, w in self.edges:
-            if dist[u] != INF and dist[u] + w < dist[v]:
-                raise ValueError("Negative-weight cycle detected")
+        # check negative cycles with one more vectorized pass
+        if (dist[eu] + ew < dist[ev]).any():
+            raise ValueError("Negative-weight cycle detected")
 
-        return dist, parent
+        return dist.tolist(), parent.tolist()
 
 if __name__ == "__main__":
     # tiny demo
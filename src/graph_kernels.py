@@ -0,0 +1,144 @@
+# graph_kernels.py
+# Numba-compiled kernels over the CSR arrays built by Graph.finalize().
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def bfs_csr(indptr, indices, n, start, allow_pull=True):
+    """
+    Direction-optimizing BFS over CSR adjacency (Beamer push/pull hybrid).
+
+    Levels run top-down ("push") until the frontier carries more edges than
+    1/14 of the unexplored ones, then flip to bottom-up ("pull") where each
+    unvisited vertex scans its own neighbours for a frontier member. The
+    pull step walks out-edges, so it is only correct on symmetric adjacency;
+    callers with directed edges pass allow_pull=False to stay top-down.
+    Returns (dist, parent) int32 arrays; dist is -1 for unreachable vertices.
+    """
+    dist = np.full(n, -1, np.int32)
+    parent = np.full(n, -1, np.int32)
+    frontier = np.empty(n, np.int32)
+    next_frontier = np.empty(n, np.int32)
+    in_frontier = np.zeros(n, np.uint8)
+
+    dist[start] = 0
+    frontier[0] = start
+    f_size = 1
+    in_frontier[start] = 1
+
+    # edges hanging off still-unexplored vertices (m_u in the Beamer paper)
+    m_u = indices.shape[0] - (indptr[start + 1] - indptr[start])
+    level = 0
+
+    while f_size > 0:
+        m_f = 0  # edges out of the current frontier
+        for i in range(f_size):
+            u = frontier[i]
+            m_f += indptr[u + 1] - indptr[u]
+
+        nf = 0
+        if allow_pull and m_f > m_u // 14:
+            # bottom-up: each unvisited vertex looks for a visited neighbour
+            for v in range(n):
+                if dist[v] < 0:
+                    for k in range(indptr[v], indptr[v + 1]):
+                        u = indices[k]
+                        if in_frontier[u]:
+                            dist[v] = level + 1
+                            parent[v] = u
+                            next_frontier[nf] = v
+                            nf += 1
+                            break
+        else:
+            # top-down: expand the frontier's out-edges
+            for i in range(f_size):
+                u = frontier[i]
+                for k in range(indptr[u], indptr[u + 1]):
+                    v = indices[k]
+                    if dist[v] < 0:
+                        dist[v] = level + 1
+                        parent[v] = u
+                        next_frontier[nf] = v
+                        nf += 1
+
+        for i in range(f_size):
+            in_frontier[frontier[i]] = 0
+        for i in range(nf):
+            v = next_frontier[i]
+            in_frontier[v] = 1
+            m_u -= indptr[v + 1] - indptr[v]
+
+        frontier, next_frontier = next_frontier, frontier
+        f_size = nf
+        level += 1
+
+    return dist, parent
+
+@njit(cache=True)
+def dijkstra_csr(indptr, indices, weights, src, dst):
+    """
+    Dijkstra over CSR adjacency with a manual binary heap
+    (Numba has no heapq). Returns dist(src, dst), inf if unreachable.
+    """
+    n = indptr.shape[0] - 1
+    dist = np.full(n, np.inf)
+    dist[src] = 0.0
+
+    # heap of (distance, vertex); capacity = one slot per relaxation
+    cap = indices.shape[0] + 1
+    heap_d = np.empty(cap, np.float64)
+    heap_v = np.empty(cap, np.int32)
+    size = 0
+
+    # push source
+    heap_d[0] = 0.0
+    heap_v[0] = src
+    size = 1
+
+    while size > 0:
+        # pop min
+        d = heap_d[0]
+        cur = heap_v[0]
+        size -= 1
+        heap_d[0] = heap_d[size]
+        heap_v[0] = heap_v[size]
+        # sift down
+        i = 0
+        while True:
+            left = 2 * i + 1
+            right = left + 1
+            smallest = i
+            if left < size and heap_d[left] < heap_d[smallest]:
+                smallest = left
+            if right < size and heap_d[right] < heap_d[smallest]:
+                smallest = right
+            if smallest == i:
+                break
+            heap_d[i], heap_d[smallest] = heap_d[smallest], heap_d[i]
+            heap_v[i], heap_v[smallest] = heap_v[smallest], heap_v[i]
+            i = smallest
+
+        if d > dist[cur]:
+            continue
+        if cur == dst:
+            return d
+
+        for k in range(indptr[cur], indptr[cur + 1]):
+            nbr = indices[k]
+            nd = d + weights[k]
+            if nd < dist[nbr]:
+                dist[nbr] = nd
+                # push (nd, nbr), sifting up
+                i = size
+                heap_d[i] = nd
+                heap_v[i] = nbr
+                size += 1
+                while i > 0:
+                    p = (i - 1) // 2
+                    if heap_d[p] <= heap_d[i]:
+                        break
+                    heap_d[i], heap_d[p] = heap_d[p], heap_d[i]
+                    heap_v[i], heap_v[p] = heap_v[p], heap_v[i]
+                    i = p
+
+    return dist[dst]
@@ -95,18 +95,21 @@ def print_travel_info(label, cities, graph, weather_risk, route):
 
 # BFS tree route builder
 def reconstruct_tree_route(parent, start):
-    route = [start]
-    children = {}
+    # vertex-indexed child lists (parent is already a list) and an explicit
+    # stack: single pass, no dict hashing, no recursion-depth limit
+    children = [[] for _ in range(len(parent))]
     for v, p in enumerate(parent):
         if p != -1:
-            children.setdefault(p, []).append(v)
-
-    def dfs_tree(u):
-        for v in children.get(u, []):
-            route.append(v)
-            dfs_tree(v)
-
-    dfs_tree(start)
+            children[p].append(v)
+
+    route = []
+    stack = [start]
+    while stack:
+        u = stack.pop()
+        route.append(u)
+        # reversed push keeps the recursive visit order
+        for v in reversed(children[u]):
+            stack.append(v)
     return route
 
 # Option 1 — User selects a city
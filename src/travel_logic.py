@@ -1,8 +1,13 @@
 import datetime as dt
+
+import numpy as np
+from numba import njit
+
 from data_models import BASE_MPG, MAX_SPEED, MAX_HOURS_PER_DAY
-import heapq
+from graph_kernels import dijkstra_csr
 
 # Compute real distance + slope angle
+@njit(cache=True)
 def edge_real_distance(map_d_miles, sea_A_ft, sea_B_ft):
     if map_d_miles == 0:
         return 0.0, 0.0
@@ -16,6 +21,7 @@ def edge_real_distance(map_d_miles, sea_A_ft, sea_B_ft):
     return real_distance, tan_theta
 
 # Adjust MPG based on slope
+@njit(cache=True)
 def adjusted_mpg(tan_theta):
     """
     Realistic MPG model:
@@ -30,105 +36,174 @@ def adjusted_mpg(tan_theta):
 
 # Dijkstra shortest path (fallback)
 def shortest_path_distance(graph, src, dst):
-    n = len(graph.adj)
-    INF = float("inf")
-    dist = [INF] * n
-    dist[src] = 0.0
+    graph.finalize()
+    return float(dijkstra_csr(graph.indptr, graph.indices, graph.weights, src, dst))
 
-    pq = [(0.0, src)]
 
-    while pq:
-        d, cur = heapq.heappop(pq)
-        if d > dist[cur]:
-            continue
-        if cur == dst:
-            return d
 
-        for nbr, w in graph.adj[cur]:
-            nd = d + w
-            if nd < dist[nbr]:
-                dist[nbr] = nd
-                heapq.heappush(pq, (nd, nbr))
+# Fused per-route geometry/MPG kernel
+def compute_segment_metrics(cities, graph, route_cities):
+    """
+    Vectorized fusion of edge_real_distance + adjusted_mpg + gallons/hours
+    across a whole route: one NumPy pass instead of a Python call per edge.
+    The scalar helpers above stay for single-edge debugging. Returns a dict
+    of parallel ndarrays keyed u, v, map_d, tan_theta, real_d, mpg,
+    gallons, time_h.
+    """
+    n_seg = max(0, len(route_cities) - 1)
+    u = np.array(route_cities[:-1] if n_seg else [], dtype=np.int64)
+    v = np.array(route_cities[1:] if n_seg else [], dtype=np.int64)
+
+    # map distances: O(1) edge lookups; the first missing edge triggers the
+    # all-pairs matrix so every further fallback is a plain array read
+    map_d = np.empty(n_seg)
+    dist_matrix = None
+    for i in range(n_seg):
+        w = graph.edge_w.get((route_cities[i], route_cities[i + 1]))
+        if w is None:
+            if dist_matrix is None:
+                dist_matrix = graph.distance_matrix()
+            w = dist_matrix[route_cities[i], route_cities[i + 1]]
+        map_d[i] = w
+
+    sea_u = np.array([cities[c].sea_level_ft for c in route_cities[:-1]] if n_seg else [])
+    sea_v = np.array([cities[c].sea_level_ft for c in route_cities[1:]] if n_seg else [])
+
+    # same op order as the scalar helpers, so results match bit-for-bit
+    positive = map_d > 0
+    safe_d = np.where(positive, map_d, 1.0)
+    tan_theta = np.where(positive, (sea_v - sea_u) / 5280.0 / safe_d, 0.0)
+    real_d = map_d * (1.0 + tan_theta)
+
+    factor = 1.0 + tan_theta
+    safe_factor = np.where(factor > 0, factor, 1.0)
+    mpg = np.where(factor > 0, BASE_MPG / safe_factor, BASE_MPG)
+
+    gallons = real_d / mpg
+    time_h = real_d / MAX_SPEED
 
-    return float("inf")
+    return {
+        "u": u, "v": v, "map_d": map_d, "tan_theta": tan_theta,
+        "real_d": real_d, "mpg": mpg, "gallons": gallons, "time_h": time_h,
+    }
 
 
+# Precompute the date-independent part of a trip
+def precompute_route_segments(cities, graph, route_cities):
+    """
+    Per-segment geometry/MPG numbers (real distance, gallons, hours) do not
+    depend on the start date, so compute them once per route instead of once
+    per candidate date. Returns [(u, v, real_d, gallons, time_h), ...].
+    """
+    m = compute_segment_metrics(cities, graph, route_cities)
+    return list(zip(
+        m["u"].tolist(), m["v"].tolist(),
+        m["real_d"].tolist(), m["gallons"].tolist(), m["time_h"].tolist(),
+    ))
 
-# Simulate trip with day splitting & dynamic MPG
-def simulate_trip(
-    cities,
-    graph,
-    weather_risk,
-    route_cities,
-    start_date: dt.date,
-):
-    total_real_distance = 0.0
-    total_gallons = 0.0
-    total_hours = 0.0
 
-    daily_risk = []
-    daily_hours = []
-    daily_distance = []
-    daily_gallons = []
-    daily_mpg = []
+def _trip_risk_profile(segments, n_rows):
+    """
+    Replay the day-splitting calendar walk without dates and record how much
+    of each city's daily risk lands on each trip-day offset. The walk does
+    not depend on the start date, so coeff[c, off] prices every candidate
+    start at once: total_risk(start) = sum coeff[c, off] * risk(c, start+off).
+    """
+    cs = []
+    offs = []
+    off = 0
+    hours_today = 0.0
 
-    current_date = start_date
+    for u, v, _, _, time_h in segments:
+        while hours_today + time_h > MAX_HOURS_PER_DAY:
+            remain = MAX_HOURS_PER_DAY - hours_today
+            cs.append(u)
+            cs.append(v)
+            offs.append(off)
+            offs.append(off)
+            off += 1
+            hours_today = 0.0
+            time_h -= remain
+        hours_today += time_h
+        cs.append(u)
+        cs.append(v)
+        offs.append(off)
+        offs.append(off)
+
+    trip_days = off + 1
+    coeff = np.zeros((n_rows, trip_days))
+    np.add.at(
+        coeff,
+        (np.array(cs, dtype=np.intp), np.array(offs, dtype=np.intp)),
+        0.5,  # each edge contributes (r_u + r_v) / 2 to its day
+    )
+    return coeff, trip_days
+
+
+@njit(cache=True)
+def _risk_at(risk_arr, cid, day_idx):
+    # dense-array equivalent of the old dict .get((cid, date), 1.0)
+    if 0 <= day_idx < risk_arr.shape[1] and cid < risk_arr.shape[0]:
+        return risk_arr[cid, day_idx]
+    return 1.0
+
+
+@njit(cache=True)
+def _simulate_days(u_arr, v_arr, real_d_arr, gallons_arr, time_h_arr,
+                   risk_arr, start_day_idx, max_hours, max_days):
+    """
+    The day-splitting walk of simulate_trip as a compiled kernel over SoA
+    segment arrays. Returns per-day (hours, risk, distance, gallons) arrays
+    trimmed to the trip length, plus the running totals.
+    """
+    day_hours = np.zeros(max_days)
+    day_risk = np.zeros(max_days)
+    day_dist = np.zeros(max_days)
+    day_gal = np.zeros(max_days)
+
+    d = 0  # day offset within the trip
     hours_today = 0.0
     risk_today = 0.0
     dist_today = 0.0
     gallons_today = 0.0
 
-    for i in range(len(route_cities) - 1):
-        u = route_cities[i]
-        v = route_cities[i + 1]
-
-        # map distance (from adjacency)
-        map_d = None
-        for nbr, w in graph.adj[u]:
-            if nbr == v:
-                map_d = w
-                break
-        if map_d is None:
-            map_d = shortest_path_distance(graph, u, v)
-
-        # real distance + slope
-        real_d, tan_theta = edge_real_distance(
-            map_d, cities[u].sea_level_ft, cities[v].sea_level_ft
-        )
+    total_real_distance = 0.0
+    total_gallons = 0.0
+    total_hours = 0.0
 
-        mpg_now = adjusted_mpg(tan_theta)
-        gallons = real_d / mpg_now
-        time_h = real_d / MAX_SPEED
+    for i in range(u_arr.shape[0]):
+        u = u_arr[i]
+        v = v_arr[i]
+        real_d = real_d_arr[i]
+        gallons = gallons_arr[i]
+        time_h = time_h_arr[i]
 
         # Day splitting (strict 8-hour limit)
-        while hours_today + time_h > MAX_HOURS_PER_DAY:
-            remain = MAX_HOURS_PER_DAY - hours_today
+        while hours_today + time_h > max_hours:
+            remain = max_hours - hours_today
 
             proportion = remain / time_h
 
             # partial allocation
-            hours_today = MAX_HOURS_PER_DAY
+            hours_today = max_hours
             dist_portion = real_d * proportion
             gal_portion = gallons * proportion
 
             dist_today += dist_portion
             gallons_today += gal_portion
 
-            r_u = weather_risk.get((u, current_date), 1.0)
-            r_v = weather_risk.get((v, current_date), 1.0)
+            r_u = _risk_at(risk_arr, u, start_day_idx + d)
+            r_v = _risk_at(risk_arr, v, start_day_idx + d)
             risk_today += (r_u + r_v) / 2.0
 
             # close the day
-            daily_hours.append((current_date, hours_today))
-            daily_risk.append((current_date, risk_today))
-            daily_distance.append((current_date, dist_today))
-            daily_gallons.append((current_date, gallons_today))
-            daily_mpg.append(
-                (current_date, dist_today / gallons_today if gallons_today > 0 else None)
-            )
+            day_hours[d] = hours_today
+            day_risk[d] = risk_today
+            day_dist[d] = dist_today
+            day_gal[d] = gallons_today
 
             # move to next day
-            current_date += dt.timedelta(days=1)
+            d += 1
             hours_today = 0.0
             risk_today = 0.0
             dist_today = 0.0
@@ -143,8 +218,8 @@ def simulate_trip(
         hours_today += time_h
         total_hours += time_h
 
-        r_u = weather_risk.get((u, current_date), 1.0)
-        r_v = weather_risk.get((v, current_date), 1.0)
+        r_u = _risk_at(risk_arr, u, start_day_idx + d)
+        r_v = _risk_at(risk_arr, v, start_day_idx + d)
         risk_today += (r_u + r_v) / 2.0
 
         dist_today += real_d
@@ -154,14 +229,66 @@ def simulate_trip(
         total_gallons += gallons
 
     # Finish last day
-    daily_hours.append((current_date, hours_today))
-    daily_risk.append((current_date, risk_today))
-    daily_distance.append((current_date, dist_today))
-    daily_gallons.append((current_date, gallons_today))
-    daily_mpg.append(
-        (current_date, dist_today / gallons_today if gallons_today > 0 else None)
+    day_hours[d] = hours_today
+    day_risk[d] = risk_today
+    day_dist[d] = dist_today
+    day_gal[d] = gallons_today
+
+    return (day_hours[:d + 1], day_risk[:d + 1], day_dist[:d + 1],
+            day_gal[:d + 1], total_real_distance, total_gallons, total_hours)
+
+
+# Simulate trip with day splitting & dynamic MPG
+def simulate_trip(
+    cities,
+    graph,
+    weather_risk,
+    route_cities,
+    start_date: dt.date,
+    segments=None,
+):
+    if segments is None:
+        segments = precompute_route_segments(cities, graph, route_cities)
+
+    risk_arr, risk_start = weather_risk
+    start_day_idx = (start_date - risk_start).days  # index into risk_arr columns
+
+    # package the segments as SoA arrays for the kernel
+    n_seg = len(segments)
+    u_arr = np.fromiter((s[0] for s in segments), dtype=np.int64, count=n_seg)
+    v_arr = np.fromiter((s[1] for s in segments), dtype=np.int64, count=n_seg)
+    real_d_arr = np.fromiter((s[2] for s in segments), dtype=np.float64, count=n_seg)
+    gallons_arr = np.fromiter((s[3] for s in segments), dtype=np.float64, count=n_seg)
+    time_h_arr = np.fromiter((s[4] for s in segments), dtype=np.float64, count=n_seg)
+
+    # every closed day holds exactly max_hours, so this bounds the trip length
+    max_days = int(time_h_arr.sum() / MAX_HOURS_PER_DAY) + 2
+
+    (day_hours, day_risk, day_dist, day_gal,
+     total_real_distance, total_gallons, total_hours) = _simulate_days(
+        u_arr, v_arr, real_d_arr, gallons_arr, time_h_arr,
+        risk_arr, start_day_idx, MAX_HOURS_PER_DAY, max_days,
     )
 
+    # rebuild the date-keyed lists callers expect
+    daily_hours = []
+    daily_risk = []
+    daily_distance = []
+    daily_gallons = []
+    daily_mpg = []
+    current_date = start_date
+    for off in range(day_hours.shape[0]):
+        h = float(day_hours[off])
+        dist = float(day_dist[off])
+        gal = float(day_gal[off])
+        daily_hours.append((current_date, h))
+        daily_risk.append((current_date, float(day_risk[off])))
+        daily_distance.append((current_date, dist))
+        daily_gallons.append((current_date, gal))
+        daily_mpg.append((current_date, dist / gal if gal > 0 else None))
+        if off + 1 < day_hours.shape[0]:
+            current_date += dt.timedelta(days=1)
+
     total_risk = sum(r for _, r in daily_risk)
     overall_mpg = (
         total_real_distance / total_gallons if total_gallons > 0 else None
@@ -193,24 +320,44 @@ def best_travel_date(
     end_window=dt.date(2025, 11, 30),
 ):
 
-    best_date = None
-    best_result = None
+    risk_arr, risk_start = weather_risk
 
-    d = start_window
-    while d <= end_window:
-        result = simulate_trip(cities, graph, weather_risk, route_cities, d)
+    # the geometry/MPG work is identical for every candidate date
+    segments = precompute_route_segments(cities, graph, route_cities)
 
-        if result["end_date"] > end_window:
-            d += dt.timedelta(days=1)
-            continue
+    # the day-splitting calendar is also date-independent, so replay it once
+    # and price every candidate start date with vectorized reductions
+    n_rows = risk_arr.shape[0]
+    for u, v, _, _, _ in segments:
+        n_rows = max(n_rows, u + 1, v + 1)
+    coeff, trip_days = _trip_risk_profile(segments, n_rows)
 
-        if best_result is None or result["total_risk"] < best_result["total_risk"]:
-            best_result = result
-            best_date = d
+    # only start dates whose trip ends inside the window are feasible
+    last_start = end_window - dt.timedelta(days=trip_days - 1)
+    n_feasible = (last_start - start_window).days + 1
+    if n_feasible <= 0:
+        raise ValueError("Route cannot be completed in the window.")
 
-        d += dt.timedelta(days=1)
+    # risk columns for the whole candidate range, 1.0 outside the data window
+    base = (start_window - risk_start).days
+    width = n_feasible + trip_days - 1
+    padded = np.full((n_rows, width), 1.0)
+    n_risk_cities, n_days = risk_arr.shape
+    src_lo = max(0, base)
+    src_hi = min(n_days, base + width)
+    if src_hi > src_lo:
+        padded[:n_risk_cities, src_lo - base:src_hi - base] = (
+            risk_arr[:, src_lo:src_hi]
+        )
 
-    if best_result is None:
-        raise ValueError("Route cannot be completed in the window.")
+    # total risk for all candidate starts: one reduction per trip day
+    risks = np.zeros(n_feasible)
+    for off in range(trip_days):
+        risks += coeff[:, off] @ padded[:, off:off + n_feasible]
 
+    # argmin keeps the earliest date on ties, like the old strict < scan
+    best_date = start_window + dt.timedelta(days=int(np.argmin(risks)))
+    best_result = simulate_trip(
+        cities, graph, weather_risk, route_cities, best_date, segments=segments
+    )
     return best_date, best_result
\ No newline at end of file